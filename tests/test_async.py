@@ -0,0 +1,188 @@
+import asyncio
+import copy
+import functools
+import importlib
+import unittest
+from dataclasses import dataclass
+
+pipeline = importlib.import_module("wrangle_pypes.async.pipeline")
+transformations = importlib.import_module("wrangle_pypes.async.transformations")
+AsyncPipeline = pipeline.AsyncPipeline
+AsyncTransformation = pipeline.AsyncTransformation
+ForEach = transformations.ForEach
+Constant = transformations.Constant
+Get = transformations.Get
+If = transformations.If
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+def logged(apply):
+    @functools.wraps(apply)
+    def wrapper(self, pipeline, data, *args, **kwargs):
+        return apply(self, pipeline, data, *args, **kwargs)
+
+    return wrapper
+
+
+class Doubled(AsyncTransformation):
+    @logged
+    async def apply(self, pipeline, data, *args, **kwargs):
+        await asyncio.sleep(0)
+        if data is None:
+            raise ValueError("no data")
+        return data * 2
+
+
+class AwaitableResultTest(unittest.TestCase):
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_decorated_async_apply_is_awaited(self):
+        self.assertFalse(Doubled._is_async)
+        pipe = AsyncPipeline({Point: {"x": Get("x") | Doubled(), "y": Get("y")}})
+        for parallel_build in (False, True):
+            pipe.parallel_build = parallel_build
+            point = self.run_async(pipe.create(Point, {"x": 1, "y": 2}))
+            self.assertEqual(point, Point(2, 2))
+            direct = AsyncPipeline(
+                {Point: {"x": Doubled(), "y": Doubled()}},
+                parallel_build=parallel_build,
+            )
+            self.assertEqual(self.run_async(direct.create(Point, 2)), Point(4, 4))
+        self.assertEqual(self.run_async(Doubled()(pipe, 3)), 6)
+        self.assertEqual(self.run_async(ForEach(Doubled())(pipe, [1, 2])), [2, 4])
+        self.assertEqual(self.run_async(If(bool, Doubled())(pipe, 1)), 2)
+
+    def test_decorated_async_apply_errors_name_field(self):
+        pipe = AsyncPipeline({Point: {"x": Get("x") | Doubled(), "y": Get("y")}})
+        with self.assertRaises(ValueError) as caught:
+            self.run_async(pipe.create(Point, {"x": None, "y": 2}))
+        self.assertEqual(str(caught.exception), "failed @ Point.x: Doubled: no data")
+
+
+class IfTest(unittest.TestCase):
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_branches(self):
+        pipe = AsyncPipeline({})
+        then = If(bool, Doubled())
+        self.assertEqual(self.run_async(then(pipe, 2)), 4)
+        self.assertIsNone(self.run_async(then(pipe, 0)))
+        either = If(bool, Doubled(), Constant("else"))
+        self.assertEqual(self.run_async(either(pipe, 0)), "else")
+        then.else_ = either.else_
+        self.assertEqual(self.run_async(then(pipe, 0)), "else")
+
+    def test_copy_rebinds_branch(self):
+        original = If(bool, Doubled())
+        clone = copy.copy(original)
+        clone.else_ = Constant("else")
+        self.assertEqual(self.run_async(clone(AsyncPipeline({}), 0)), "else")
+        self.assertIsNone(self.run_async(original(AsyncPipeline({}), 0)))
+
+
+class GetOrCreateMultipleTest(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.found = {}
+
+        async def batched_lookup(model, lookup_kwargs):
+            self.calls.append(lookup_kwargs)
+            return [self.found.get(kwargs["x"]) for kwargs in lookup_kwargs]
+
+        self.pipeline = AsyncPipeline(
+            {Point: {"x": Get("x"), "y": Get("y")}}, batched_lookup=batched_lookup
+        )
+
+    def get_or_create_multiple(self, data, **kwargs):
+        return asyncio.run(
+            self.pipeline.get_or_create_multiple(Point, data, ["x"], **kwargs)
+        )
+
+    def test_looks_up_all_rows_at_once(self):
+        self.found[1] = Point(1, 0)
+        data = [{"x": 1, "y": 1}, {"x": 2, "y": 2}, {"x": 3, "y": 3}]
+        self.assertEqual(
+            self.get_or_create_multiple(data),
+            [(Point(1, 0), False), (Point(2, 2), True), (Point(3, 3), True)],
+        )
+        self.assertEqual(self.calls, [[{"x": 1}, {"x": 2}, {"x": 3}]])
+
+    def test_rejects_result_count_mismatch(self):
+        async def batched_lookup(model, lookup_kwargs):
+            return [None]
+
+        self.pipeline.batched_lookup = batched_lookup
+        with self.assertRaises(ValueError) as caught:
+            self.get_or_create_multiple([{"x": 1, "y": 1}, {"x": 2, "y": 2}])
+        self.assertEqual(
+            str(caught.exception), "Batched lookup returned 1 results for 2 lookups."
+        )
+
+    def test_rows_sharing_a_match_reuse_the_first_instance(self):
+        data = [{"x": 1, "y": 1}, {"x": 1, "y": 2}, {"x": 2, "y": 3}, {"x": 1, "y": 4}]
+        result = self.get_or_create_multiple(data, _cache=True)
+        self.assertEqual(
+            result,
+            [
+                (Point(1, 1), True),
+                (Point(1, 1), False),
+                (Point(2, 3), True),
+                (Point(1, 1), False),
+            ],
+        )
+        self.assertIs(result[1][0], result[0][0])
+        self.assertIs(result[3][0], result[0][0])
+        self.assertEqual(self.calls, [[{"x": 1}, {"x": 2}]])
+
+    def test_rows_are_not_shared_without_cache(self):
+        data = [{"x": 1, "y": 1}, {"x": 1, "y": 2}]
+        self.assertEqual(
+            self.get_or_create_multiple(data),
+            [(Point(1, 1), True), (Point(1, 2), True)],
+        )
+        self.assertEqual(self.calls, [[{"x": 1}, {"x": 1}]])
+
+    def test_cache_hits_skip_the_lookup_and_evict_least_recent(self):
+        self.pipeline.cache_size = 2
+        first = self.get_or_create_multiple(
+            [{"x": 1, "y": 1}, {"x": 2, "y": 2}], _cache=True
+        )
+        hit = self.get_or_create_multiple([{"x": 1, "y": 9}], _cache=True)
+        self.assertIs(hit[0][0], first[0][0])
+        self.assertEqual(hit, [(Point(1, 1), False)])
+        self.assertEqual(len(self.calls), 1)
+
+        # x=2 is now the least recently used match, so x=3 evicts it
+        self.get_or_create_multiple([{"x": 3, "y": 3}], _cache=True)
+        self.assertEqual(
+            self.get_or_create_multiple([{"x": 2, "y": 8}], _cache=True),
+            [(Point(2, 8), True)],
+        )
+        self.assertEqual(self.calls[-1], [{"x": 2}])
+
+    def test_replaced_transformations_and_copies(self):
+        self.get_or_create_multiple([{"x": 1, "y": 1}], _cache=True)
+        clone = copy.copy(self.pipeline)
+        clone.register(Point, {"x": Constant(0), "y": Get("y")})
+        self.pipeline.transformations[Point] = {"x": Get("x"), "y": Constant(0)}
+        self.assertEqual(
+            asyncio.run(clone.create(Point, {"x": 1, "y": 2})), Point(0, 2)
+        )
+        self.assertEqual(
+            self.get_or_create_multiple(
+                [{"x": 1, "y": 2}, {"x": 2, "y": 2}], _cache=True
+            ),
+            [(Point(1, 1), False), (Point(2, 0), True)],
+        )
+        self.assertEqual(self.calls[-1], [{"x": 2}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+import copy
+import unittest
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, List
+
+from wrangle_pypes import Pipeline
+from wrangle_pypes.pipeline import BuildCompiler
+from wrangle_pypes.transformations import (
+    Attr,
+    Cast,
+    Constant,
+    Create,
+    Custom,
+    Default,
+    ForEach,
+    Gather,
+    Get,
+    Id,
+    If,
+    Map,
+)
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+@dataclass
+class User:
+    id: int
+    name: str
+    email: str
+    kind: str
+    age: int
+    real: int
+    tag: Any
+    nick: str
+    coords: dict
+    points: List[Point]
+    sign: str
+
+
+def upper(pipeline, data, args, kwargs):
+    return data.upper()
+
+
+def make_pipeline() -> Pipeline:
+    return Pipeline(
+        {
+            User: {
+                "id": Get("id"),
+                "name": Get("user") | Get("name"),
+                "email": Get("user") | Get("email") | Cast(str.lower),
+                "kind": Constant("user"),
+                "age": Get("age") | Cast(int),
+                "real": Get("age") | Cast(int) | Attr("real"),
+                "tag": Get("tag", "none") | Custom(upper),
+                "nick": Get("user") | Get("nick", "-") | Default("anon"),
+                "coords": Get("points") | Get(0) | Gather(("x", "y")),
+                "points": Get("points") | ForEach(Create(Point)),
+                "sign": Get("age") | Cast(int) | If(bool, Constant("+"), Id()),
+            },
+            Point: {"x": Get("x") | Cast(int), "y": Get("y") | Cast(int)},
+        }
+    )
+
+
+DATA = {
+    "id": 1,
+    "user": {"name": "Ada", "email": "ADA@EXAMPLE.COM"},
+    "age": "36",
+    "points": [{"x": "1", "y": "2"}, {"x": 3, "y": 4}],
+}
+
+
+class CompiledBuildTest(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = make_pipeline()
+
+    def assertSameBuild(self, data: Any):
+        """Assert the compiled and the generic build agree, errors included."""
+        try:
+            expected = self.pipeline.build_kwargs(User, data)
+        except Exception as e:
+            with self.assertRaises(type(e)) as caught:
+                self.pipeline._build_kwargs_fast(User, data)
+            self.assertEqual(str(caught.exception), str(e))
+        else:
+            self.assertEqual(self.pipeline._build_kwargs_fast(User, data), expected)
+
+    def test_matches_build_kwargs(self):
+        self.assertSameBuild(DATA)
+        self.assertSameBuild({**DATA, "tag": "x", "age": "0"})
+        self.assertEqual(self.pipeline.create(User, DATA).points[0], Point(1, 2))
+
+    def test_matches_build_kwargs_errors(self):
+        self.assertSameBuild({k: v for k, v in DATA.items() if k != "id"})
+        self.assertSameBuild({**DATA, "age": "x"})
+        self.assertSameBuild({**DATA, "user": {"name": "Ada", "email": 1}})
+        self.assertSameBuild({**DATA, "points": [{"x": 1}]})
+        self.assertSameBuild({**DATA, "points": []})
+        self.assertSameBuild(None)
+
+    def test_error_names_field_and_transformation(self):
+        with self.assertRaises(ValueError) as caught:
+            self.pipeline.create(User, {**DATA, "age": "x"})
+        self.assertTrue(str(caught.exception).startswith("failed @ User.age: Cast:"))
+
+    def test_chain_extended_after_compile(self):
+        chain = Get("id") | Cast(int)
+        pipeline = Pipeline({Point: {"x": chain, "y": Get("id")}})
+        self.assertEqual(pipeline.create(Point, {"id": "2"}), Point(2, "2"))
+        chain | Map(str.upper)
+        with self.assertRaises(TypeError) as caught:
+            pipeline.create(Point, {"id": "2"})
+        self.assertTrue(str(caught.exception).startswith("failed @ Point.x: Map:"))
+        self.assertSameBuild(DATA)
+
+    def test_attributes_read_per_kwarg(self):
+        class Counter:
+            reads = 0
+
+            @property
+            def value(self):
+                self.reads += 1
+                return self.reads
+
+        pipeline = Pipeline({Point: {"x": Attr("value"), "y": Attr("value")}})
+        self.assertEqual(pipeline.create(Point, Counter()), Point(1, 2))
+
+    def test_subclass_apply_overrides_fast_path(self):
+        class Repeated(ForEach):
+            def apply(self, pipeline, data, *args, **kwargs):
+                return ["over"]
+
+        class Always(If):
+            def apply(self, pipeline, data, *args, **kwargs):
+                return "over"
+
+        pipeline = Pipeline(
+            {Point: {"x": Repeated(Id()), "y": Always(bool, Constant(0))}}
+        )
+        self.assertEqual(
+            pipeline.build_kwargs(Point, [1]), {"x": ["over"], "y": "over"}
+        )
+        self.assertEqual(pipeline.create(Point, [1]), Point(["over"], "over"))
+
+    def test_subclass_apply_overrides_inline(self):
+        class Doubled(Get):
+            def apply(self, pipeline, data, *args, **kwargs):
+                return Get.apply(self, pipeline, data) * 2
+
+        class Plus(Cast):
+            def apply_fast(self, pipeline, data):
+                return self.func(data) + 1
+
+        pipeline = Pipeline({Point: {"x": Doubled("x"), "y": Get("y") | Plus(int)}})
+        self.assertEqual(pipeline.create(Point, {"x": 2, "y": "2"}), Point(4, 3))
+
+    def test_transformations_changed_after_compile(self):
+        get, attr, chain = Get("x"), Attr("real"), Get("y") | Id()
+        pipeline = Pipeline({Point: {"x": get | attr, "y": chain}})
+        self.assertEqual(pipeline.create(Point, {"x": 2, "y": 3}), Point(2, 3))
+        get.key = "y"
+        attr.attr = "imag"
+        chain.transformations = (Constant(5),)
+        self.assertEqual(pipeline.create(Point, {"x": 2, "y": 3}), Point(0, 5))
+        get.key, get.default, attr.attr = "z", 7, "real"
+        self.assertEqual(pipeline.create(Point, {"x": 2, "y": 3}), Point(7, 5))
+        with self.assertRaises(AttributeError):
+            chain.transformations.append(Id())  # type: ignore
+
+    def test_equal_constants_stay_distinct(self):
+        pairs = [
+            (Decimal("1.0"), Decimal("1.00")),
+            (("a", 1.0), ("a", 1)),
+            (-0.0, 0.0),
+        ]
+        for x, y in pairs:
+            pipeline = Pipeline({Point: {"x": Constant(x), "y": Constant(y)}})
+            self.assertEqual(repr(pipeline.create(Point, None)), repr(Point(x, y)))
+
+    def test_equal_keys_are_read_once(self):
+        pipeline = Pipeline(
+            {Point: {"x": Get("u") | Get("a"), "y": Get("u") | Get("b")}}
+        )
+        build = BuildCompiler(Point)
+        build.compile(pipeline._get_compiled(Point))
+        self.assertEqual(len(build.types), 3)
+        data = {"u": {"a": 1, "b": 2}}
+        self.assertEqual(pipeline.create(Point, data), Point(1, 2))
+
+    def test_replaced_transformations_are_detected(self):
+        self.pipeline.create(Point, {"x": 1, "y": 2})
+        self.pipeline.transformations[Point] = {"x": Constant(0), "y": Get("y")}
+        self.assertEqual(self.pipeline.create(Point, {"x": 1, "y": 2}), Point(0, 2))
+        self.assertEqual(
+            self.pipeline.build_kwargs(Point, {"x": 1, "y": 2}), {"x": 0, "y": 2}
+        )
+
+    def test_invalidate_after_changing_transformations(self):
+        cast = Cast(int)
+        self.pipeline.register(Point, {"x": cast, "y": Id()})
+        self.assertEqual(self.pipeline.create(Point, "1"), Point(1, "1"))
+        cast.func = float
+        self.pipeline.invalidate(Point)
+        self.assertEqual(self.pipeline.create(Point, "1"), Point(1.0, "1"))
+
+    def test_copy_registers_separately(self):
+        self.pipeline.create(Point, {"x": 1, "y": 2})
+        clone = copy.copy(self.pipeline)
+        clone.register(Point, {"x": Constant(0), "y": Get("y")})
+        self.assertEqual(clone.create(Point, {"x": 1, "y": 2}), Point(0, 2))
+        self.assertEqual(self.pipeline.create(Point, {"x": 1, "y": 2}), Point(1, 2))
+        self.assertEqual(
+            self.pipeline.build_kwargs(Point, {"x": 1, "y": 2}), {"x": 1, "y": 2}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
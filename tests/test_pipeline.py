@@ -0,0 +1,93 @@
+import copy
+import unittest
+from dataclasses import dataclass
+
+from wrangle_pypes import Pipeline
+from wrangle_pypes.transformations import Constant, FoldInValue, Get, GetOrCreate
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+class CachedGetOrCreateTest(unittest.TestCase):
+    def setUp(self):
+        self.lookups = []
+
+        def lookup(model, lookup_kwargs):
+            self.lookups.append(lookup_kwargs)
+            return None
+
+        self.pipeline = Pipeline(
+            {Point: {"x": Get("x"), "y": Get("y")}}, lookup=lookup, cache_size=2
+        )
+
+    def get_or_create(self, data, **kwargs):
+        return self.pipeline.get_or_create(Point, data, match_targets=["x"], **kwargs)
+
+    def test_cache_hits_skip_the_lookup_and_evict_least_recent(self):
+        point, created = self.get_or_create({"x": 1, "y": 1}, _cache=True)
+        self.assertTrue(created)
+        self.get_or_create({"x": 2, "y": 2}, _cache=True)
+        self.assertEqual(
+            self.get_or_create({"x": 1, "y": 9}, _cache=True), (point, False)
+        )
+        self.assertEqual(len(self.lookups), 2)
+
+        # x=2 is now the least recently used match, so x=3 evicts it
+        self.get_or_create({"x": 3, "y": 3}, _cache=True)
+        self.assertEqual(
+            self.get_or_create({"x": 2, "y": 8}, _cache=True), (Point(2, 8), True)
+        )
+        self.assertEqual(self.lookups[-1], {"x": 2})
+
+    def test_cache_is_opt_in(self):
+        self.get_or_create({"x": 1, "y": 1})
+        self.assertEqual(self.get_or_create({"x": 1, "y": 2}), (Point(1, 2), True))
+        self.assertEqual(len(self.lookups), 2)
+
+    def test_transformation_passes_cache_flag(self):
+        transformation = GetOrCreate(Point, ["x"], cache=True)
+        first = transformation(self.pipeline, {"x": 1, "y": 1})
+        self.assertEqual(
+            transformation(self.pipeline, {"x": 1, "y": 2}), (first[0], False)
+        )
+        self.assertEqual(len(self.lookups), 1)
+
+    def test_replaced_transformations_are_used_for_lookup_and_create(self):
+        self.get_or_create({"x": 1, "y": 1})
+        self.pipeline.transformations[Point] = {"x": Constant(0), "y": Get("y")}
+        self.assertEqual(self.get_or_create({"x": 1, "y": 1}), (Point(0, 1), True))
+        self.assertEqual(self.lookups[-1], {"x": 0})
+
+    def test_copy_has_its_own_cache(self):
+        point, _ = self.get_or_create({"x": 1, "y": 1}, _cache=True)
+        clone = copy.copy(self.pipeline)
+        self.assertEqual(
+            clone.get_or_create(
+                Point, {"x": 1, "y": 2}, match_targets=["x"], _cache=True
+            ),
+            (Point(1, 2), True),
+        )
+        self.assertEqual(
+            self.get_or_create({"x": 1, "y": 3}, _cache=True), (point, False)
+        )
+
+
+class FoldInValueTest(unittest.TestCase):
+    def test_folds_value_into_other_entries(self):
+        fold = FoldInValue("id", "owner")
+        self.assertEqual(
+            fold(Pipeline(), {"id": 7, "a": {"x": 1}}), {"a": {"owner": 7, "x": 1}}
+        )
+
+    def test_nothing_to_fold_into(self):
+        fold = FoldInValue("id", "owner")
+        self.assertEqual(fold(Pipeline(), {}), {})
+        self.assertEqual(fold(Pipeline(), {"id": 7}), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,21 +1,34 @@
 from __future__ import annotations
+import asyncio
+import sys
+from collections import OrderedDict
+from inspect import isawaitable, iscoroutinefunction
 from dataclasses import dataclass, field, fields
+from types import MappingProxyType
 from typing import (
     Dict,
     Type,
     Generic,
     TypeVar,
     Any,
+    Mapping,
     Sequence,
     Iterator,
     List,
     Tuple,
+    FrozenSet,
     Optional,
     Callable,
     Awaitable,
 )
 
-from wrangle_pypes.pipeline import TransformationException, Transformation, Chain
+from wrangle_pypes.pipeline import (
+    TransformationException,
+    Transformation,
+    Chain,
+    slotted_dataclass,
+    _reraise_tf,
+)
 
 __all__ = ("AsyncPipeline",)
 
@@ -25,32 +38,76 @@ M = TypeVar("M", covariant=True)
 
 @dataclass
 class AsyncPipeline(Generic[M]):
-    transformations: Dict[Type[M], Dict[str, AsyncTransformation]] = field(
+    transformations: Dict[Type[M], Mapping[str, AsyncTransformation]] = field(
         default_factory=dict
     )
     lookup: Optional[Callable[[Type[M], Dict[str, Any]], Awaitable[M]]] = None
+    batched_lookup: Optional[
+        Callable[[Type[M], List[Dict[str, Any]]], Awaitable[List[Optional[M]]]]
+    ] = None
+    cache_size: int = 100
+    parallel_build: bool = False
+    _compiled: Dict[
+        Type[M],
+        Tuple[
+            Mapping[str, AsyncTransformation],
+            Tuple[Tuple[str, AsyncTransformation], ...],
+        ],
+    ] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _lookup_cache: OrderedDict[Tuple[Type[M], FrozenSet[Tuple[str, Any]]], M] = field(
+        default_factory=OrderedDict, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        transformations, self.transformations = self.transformations, {}
+        for model, model_transformations in transformations.items():
+            self.register(model, model_transformations)
+
+    def register(
+        self, model: Type[M], transformations: Mapping[str, AsyncTransformation]
+    ):
+        """Register the transformations building given model, replacing prior ones.
+
+        They are stored as a read-only copy, so they can only be changed by
+        registering them again.
+
+        :param model: model to register the transformations for
+        :param transformations: transformations building each kwarg of the model
+        """
+        source = self.transformations[model] = MappingProxyType(dict(transformations))
+        self._compiled[model] = source, tuple(source.items())
 
-    async def create(self, model: Type[M], data: Any, *args, **kwargs) -> Awaitable[M]:
+    async def create(self, model: Type[M], data: Any, *args, **kwargs) -> M:
         """Build a single instance of given model.
         
         :param model: model to build
         :param data: data to build instance from
         """
-        return await model(  # type: ignore
-            **self.build_kwargs(model, data, *args, **kwargs)
+        return model(  # type: ignore
+            **await self.build_kwargs(model, data, *args, **kwargs)
         )
 
     async def create_multiple(
-        self, model: Type[M], data: Sequence[Any], *args, **kwargs
-    ) -> Iterator[Awaitable[M]]:
-        """Build multiple instance of given model.
+        self,
+        model: Type[M],
+        data: Sequence[Any],
+        *args,
+        _concurrency: int = 32,
+        **kwargs,
+    ) -> List[M]:
+        """Build multiple instance of given model concurrently.
         
         :param model: model to build
         :param data: data to build instances from
+        :param _concurrency: maximum number of instances built at once, defaults to 32
         """
-        return (
-            await self.create(model, datapoint, *args, **kwargs) for datapoint in data
-        )
+        semaphore = asyncio.Semaphore(_concurrency)
+
+        async def create(datapoint: Any) -> M:
+            async with semaphore:
+                return await self.create(model, datapoint, *args, **kwargs)
+
+        return await asyncio.gather(*(create(datapoint) for datapoint in data))
 
     async def get_or_create(
         self,
@@ -59,6 +116,7 @@ class AsyncPipeline(Generic[M]):
         match_targets: List[str],
         *args,
         lookup: Optional[Callable[[Type[M], Dict[str, Any]], Awaitable[M]]] = None,
+        _cache: bool = False,
         **kwargs,
     ) -> Tuple[M, bool]:
         """Get a single instance matching given match targets or create it.
@@ -66,25 +124,31 @@ class AsyncPipeline(Generic[M]):
         :param model: model to get or create the instance for
         :param data: data to get or create the instance from
         :param match_targets: fields to use for matching the data to the DB, default to None
+        :param _cache: reuse instances previously got or created for the same
+            match, keeping the last `cache_size` ones, defaults to False
         """
         lookup = lookup or getattr(self, "lookup")
         if lookup is None:
             raise NameError("Need to supply lookup to use `get or create` features.")
 
-        if not match_targets:
-            lookup_kwargs = await self.build_kwargs(model, data, *args, **kwargs)
-        else:
-            lookup_kwargs = {
-                key: await self.build_kwarg(model, key, data, *args, **kwargs)
-                for key in match_targets
-            }
+        lookup_kwargs = await self._build_lookup_kwargs(
+            model, data, match_targets, *args, **kwargs
+        )
+        cache_key = self._cache_key(model, lookup_kwargs) if _cache else None
+        if cache_key is not None:
+            instance = self._cache_get(cache_key)
+            if instance is not None:
+                return instance, False
 
         instance = await lookup(model, lookup_kwargs)
-        if not instance:
-            if not match_targets:
-                build_kwargs = await self.build_kwargs(model, data, *args, **kwargs)
-            return model(**build_kwargs), True  # type: ignore
-        return instance, False
+        created = not instance
+        if created:
+            instance = await self._create_missing(
+                model, data, match_targets, lookup_kwargs, *args, **kwargs
+            )
+        if cache_key is not None:
+            self._cache_put(cache_key, instance)
+        return instance, created
 
     async def get_or_create_multiple(
         self,
@@ -93,33 +157,278 @@ class AsyncPipeline(Generic[M]):
         match_targets: List[str],
         *args,
         lookup: Optional[Callable[[Type[M], Dict[str, Any]], Awaitable[M]]] = None,
+        _cache: bool = False,
+        _concurrency: int = 32,
         **kwargs,
-    ) -> Iterator[Tuple[M, bool]]:
-        """Get a instances matching given match targets or create them.
+    ) -> List[Tuple[M, bool]]:
+        """Get a instances matching given match targets or create them concurrently.
+
+        All lookups are issued in one go through `batched_lookup` if it is set
+        and no explicit lookup was given, otherwise `lookup` is called per
+        datapoint.
         
         :param model: model to get or create the instances for
         :param data: data to get or create the instances from
         :param match_targets: fields to use for matching the data to the DB, default to None
+        :param _cache: reuse instances previously got or created for the same
+            match, keeping the last `cache_size` ones; datapoints sharing a
+            match are got or created once, defaults to False
+        :param _concurrency: maximum number of datapoints processed at once, defaults to 32
         """
-        return (
-            await self.get_or_create(
-                model, datapoint, match_targets, *args, lookup=lookup, **kwargs
-            )
-            for datapoint in data
+        if lookup is None and self.batched_lookup is not None:
+            batched_lookup = self.batched_lookup
+        else:
+            batched_lookup = self._batch_lookup(lookup or self.lookup, _concurrency)
+        semaphore = asyncio.Semaphore(_concurrency)
+
+        async def build_lookup_kwargs(datapoint: Any) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._build_lookup_kwargs(
+                    model, datapoint, match_targets, *args, **kwargs
+                )
+
+        async def get_or_create(
+            datapoint: Any,
+            lookup_kwargs: Dict[str, Any],
+            cache_key: Optional[Tuple[Type[M], FrozenSet[Tuple[str, Any]]]],
+            instance: Optional[M],
+        ) -> Tuple[M, bool]:
+            created = not instance
+            if created:
+                async with semaphore:
+                    instance = await self._create_missing(
+                        model, datapoint, match_targets, lookup_kwargs, *args, **kwargs
+                    )
+            if cache_key is not None:
+                self._cache_put(cache_key, instance)
+            return instance, created  # type: ignore
+
+        lookup_kwargs = await asyncio.gather(
+            *(build_lookup_kwargs(datapoint) for datapoint in data)
         )
+        cache_keys = [
+            self._cache_key(model, kwargs_) if _cache else None
+            for kwargs_ in lookup_kwargs
+        ]
+        instances = [
+            self._cache_get(key) if key is not None else None for key in cache_keys
+        ]
+        # rows sharing a cache key are looked up and created once, by the first
+        leaders: Dict[Tuple[Type[M], FrozenSet[Tuple[str, Any]]], int] = {}
+        followers: Dict[int, int] = {}
+        misses = []
+        for i, (key, instance) in enumerate(zip(cache_keys, instances)):
+            if instance is not None:
+                continue
+            if key is None:
+                misses.append(i)
+            elif key in leaders:
+                followers[i] = leaders[key]
+            else:
+                leaders[key] = i
+                misses.append(i)
+        if misses:
+            found = await batched_lookup(model, [lookup_kwargs[i] for i in misses])
+            if len(found) != len(misses):
+                raise ValueError(
+                    f"Batched lookup returned {len(found)} results "
+                    f"for {len(misses)} lookups."
+                )
+            for i, instance in zip(misses, found):
+                instances[i] = instance
+        rows = [i for i in range(len(data)) if i not in followers]
+        results: List[Any] = [None] * len(data)
+        for i, result in zip(
+            rows,
+            await asyncio.gather(
+                *(
+                    get_or_create(
+                        data[i], lookup_kwargs[i], cache_keys[i], instances[i]
+                    )
+                    for i in rows
+                )
+            ),
+        ):
+            results[i] = result
+        for i, leader in followers.items():
+            results[i] = results[leader][0], False
+        return results
+
+    def _batch_lookup(
+        self,
+        lookup: Optional[Callable[[Type[M], Dict[str, Any]], Awaitable[M]]],
+        concurrency: int,
+    ) -> Callable[[Type[M], List[Dict[str, Any]]], Awaitable[List[Optional[M]]]]:
+        """Adapt a single lookup to the `batched_lookup` interface.
+
+        :param lookup: lookup to adapt
+        :param concurrency: maximum number of lookups running at once
+        """
+        if lookup is None:
+            raise NameError("Need to supply lookup to use `get or create` features.")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def lookup_one(model: Type[M], lookup_kwargs: Dict[str, Any]) -> M:
+            async with semaphore:
+                return await lookup(model, lookup_kwargs)  # type: ignore
+
+        async def batched_lookup(
+            model: Type[M], lookup_kwargs: List[Dict[str, Any]]
+        ) -> List[Optional[M]]:
+            return await asyncio.gather(
+                *(lookup_one(model, kwargs) for kwargs in lookup_kwargs)
+            )
+
+        return batched_lookup
+
+    def clear_cache(self):
+        """Forget all instances cached by `get_or_create`."""
+        self._lookup_cache.clear()
+
+    def _cache_key(
+        self, model: Type[M], lookup_kwargs: Dict[str, Any]
+    ) -> Optional[Tuple[Type[M], FrozenSet[Tuple[str, Any]]]]:
+        """Build the lookup cache key, None if any lookup value is unhashable.
+
+        :param model: model being looked up
+        :param lookup_kwargs: kwargs used for the lookup
+        """
+        try:
+            return model, frozenset(lookup_kwargs.items())
+        except TypeError:
+            return None
+
+    def _cache_get(
+        self, key: Tuple[Type[M], FrozenSet[Tuple[str, Any]]]
+    ) -> Optional[M]:
+        instance = self._lookup_cache.get(key)
+        if instance is not None:
+            self._lookup_cache.move_to_end(key)
+        return instance
+
+    def _cache_put(
+        self, key: Tuple[Type[M], FrozenSet[Tuple[str, Any]]], instance: Any
+    ):
+        self._lookup_cache[key] = instance
+        self._lookup_cache.move_to_end(key)
+        if len(self._lookup_cache) > self.cache_size:
+            self._lookup_cache.popitem(last=False)
+
+    async def _build_lookup_kwargs(
+        self, model: Type[M], data: Any, match_targets: List[str], *args, **kwargs
+    ) -> Dict[str, Any]:
+        """Build the kwargs used to look up an instance of given model.
+
+        :param model: model to build lookup kwargs for
+        :param data: data to build lookup kwargs from
+        :param match_targets: fields to use for matching, all fields if empty
+        """
+        if not match_targets:
+            return await self.build_kwargs(model, data, *args, **kwargs)
+        return {
+            key: await self.build_kwarg(model, key, data, *args, **kwargs)
+            for key in match_targets
+        }
+
+    async def _create_missing(
+        self,
+        model: Type[M],
+        data: Any,
+        match_targets: List[str],
+        lookup_kwargs: Dict[str, Any],
+        *args,
+        **kwargs,
+    ) -> M:
+        """Create an instance of given model that wasn't found by its lookup.
+
+        :param model: model to create
+        :param data: data to create the instance from
+        :param match_targets: fields used for matching, all fields if empty
+        :param lookup_kwargs: kwargs the lookup was done with
+        """
+        if match_targets:
+            build_kwargs = await self.build_kwargs(model, data, *args, **kwargs)
+        else:
+            build_kwargs = lookup_kwargs
+        return model(**build_kwargs)  # type: ignore
 
     async def build_kwargs(
         self, model: Type[M], data: Any, *args, **kwargs
     ) -> Dict[str, Any]:
         """Build kwargs for an instance of given model.
         
+        If `parallel_build` is set, async kwargs are awaited concurrently,
+        so their transformations must not depend on each other.
+        
         :param model: model to build kwargs for
         :param data: data to build kwargs from
         """
-        return {
-            name: await self.build_kwarg(model, name, data, *args, **kwargs)
-            for name, transformation in self.transformations[model].items()
+        kwargs_ = {}
+        pending = {}
+        try:
+            for name, transformation in self._get_compiled(model):
+                value = transformation.call(self, data, *args, **kwargs)
+                if transformation._is_async or isawaitable(value):
+                    if self.parallel_build:
+                        pending[name] = value
+                    else:
+                        value = await value
+                kwargs_[name] = value
+            if pending:
+                values = await asyncio.gather(*pending.values(), return_exceptions=True)
+                for name, value in zip(pending, values):
+                    if isinstance(value, BaseException):
+                        raise value
+                    kwargs_[name] = value
+        except TransformationException as e:
+            for coroutine in pending.values():
+                coroutine.close()
+            _reraise_tf(model, name, e)
+        return kwargs_
+
+    def _get_compiled(
+        self, model: Type[M]
+    ) -> Tuple[Tuple[str, AsyncTransformation], ...]:
+        """Get the cached (name, transformation) pairs of given model.
+
+        :param model: model to get the transformations for
+        """
+        # the source check catches `transformations` entries replaced directly
+        source = self.transformations[model]
+        compiled = self._compiled.get(model)
+        if compiled is None or compiled[0] is not source:
+            compiled = self._compiled[model] = source, tuple(source.items())
+        return compiled[1]
+
+    def invalidate(self, model: Optional[Type[M]] = None):
+        """Drop cached transformations, e.g. after changing one in place.
+
+        :param model: model to invalidate, defaults to all models
+        """
+        if model is None:
+            self._compiled.clear()
+        else:
+            self._compiled.pop(model, None)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # caches are per pipeline, so copies start with fresh ones, and
+        # read-only views can't be pickled, so they are registered again
+        state = {
+            name: value
+            for name, value in self.__dict__.items()
+            if name not in ("_compiled", "_lookup_cache")
+        }
+        state["transformations"] = {
+            model: dict(transformations)
+            for model, transformations in self.transformations.items()
         }
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._compiled = {}
+        self._lookup_cache = OrderedDict()
+        self.__post_init__()
 
     async def build_kwarg(
         self, model: Type[M], kwarg: str, data: Any, *args, **kwargs
@@ -131,22 +440,85 @@ class AsyncPipeline(Generic[M]):
         :param data: data to build kwarg from
         """
         try:
-            return await self.transformations[model][kwarg](self, data, *args, **kwargs)
+            transformation = self.transformations[model][kwarg]
+            value = transformation.call(self, data, *args, **kwargs)
+            if transformation._is_async or isawaitable(value):
+                value = await value
+            return value
         except TransformationException as e:
-            e_type, transformation, *e_args = e.args
-            raise e_type(
-                f"failed @ {model.__name__}.{kwarg}: {transformation.__name__}: {e_args[0]}",
-                *e_args[1:],
-            )
+            _reraise_tf(model, kwarg, e)
+
+    @staticmethod
+    def configure_loop(loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Opt in to a faster event loop for running pipelines.
+
+        Outside of a running loop this installs uvloop's event loop policy, if
+        it is available (`wrangle_pypes[fast]`), so loops created afterwards,
+        e.g. by `asyncio.run`, use it. Given a loop, or when called from within
+        one, it enables eager task execution on Python 3.12+, which lets
+        gathered work that never suspends finish without a scheduler trip.
+        
+        :param loop: loop to configure, defaults to the running loop
+        """
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                try:
+                    import uvloop  # type: ignore
+                except ImportError:
+                    return
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+                return
+        if sys.version_info >= (3, 12):
+            loop.set_task_factory(asyncio.eager_task_factory)
 
 
 @dataclass
 class AsyncTransformation:
-    async def apply(self, pipeline: AsyncPipeline, data: Any, *args, **kwargs) -> Any:
+    """Base of all async transformations.
+
+    Subclasses may implement `apply` as a plain function. Awaiting a call
+    works either way, while `call` returns the result of a plain `apply`
+    directly instead of an awaitable. `_is_async` tells its callers whether
+    they need to await; a plain `apply` returning an awaitable, e.g. a
+    decorated async one, is only noticed at runtime, so check the result
+    with `isawaitable` otherwise.
+    """
+
+    __slots__ = ()
+    _is_async = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._is_async = iscoroutinefunction(cls.apply)
+
+    def apply(self, pipeline: AsyncPipeline, data: Any, *args, **kwargs) -> Any:
         raise NotImplementedError
 
     async def __call__(
         self, pipeline: AsyncPipeline, data: Any, *args, **kwargs
+    ) -> Any:
+        value = self.call(pipeline, data, *args, **kwargs)
+        if self._is_async or isawaitable(value):
+            value = await value
+        return value
+
+    def call(self, pipeline: AsyncPipeline, data: Any, *args, **kwargs) -> Any:
+        if self._is_async:
+            return self._call_async(pipeline, data, *args, **kwargs)
+        try:
+            value = self.apply(pipeline, data, *args, **kwargs)
+        except Exception as e:
+            if isinstance(e, TransformationException):
+                raise e
+            raise TransformationException(type(e), type(self), *e.args)
+        if isawaitable(value):
+            return self._await(value)
+        return value
+
+    async def _call_async(
+        self, pipeline: AsyncPipeline, data: Any, *args, **kwargs
     ) -> Any:
         try:
             return await self.apply(pipeline, data, *args, **kwargs)
@@ -155,18 +527,28 @@ class AsyncTransformation:
                 raise e
             raise TransformationException(type(e), type(self), *e.args)
 
+    async def _await(self, value: Awaitable) -> Any:
+        try:
+            return await value
+        except Exception as e:
+            if isinstance(e, TransformationException):
+                raise e
+            raise TransformationException(type(e), type(self), *e.args)
+
     def __or__(self, other: AsyncTransformation) -> AsyncChain:
         return AsyncChain() | self | other
 
 
-@dataclass
+@slotted_dataclass
 class AsyncChain(AsyncTransformation):
     transformations: List[AsyncTransformation] = field(init=False, default_factory=list)
 
     async def apply(self, pipeline: AsyncPipeline, data: Any, *args, **kwargs) -> Any:
         val = data
         for transformation in self.transformations:
-            val = await transformation(pipeline, val, *args, **kwargs)
+            val = transformation.call(pipeline, val, *args, **kwargs)
+            if transformation._is_async or isawaitable(val):
+                val = await val
         return val
 
     def __or__(self, other: AsyncTransformation) -> AsyncChain:
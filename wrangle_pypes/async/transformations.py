@@ -3,7 +3,10 @@ This is a lot of duplication still looking for a cleaner way to
 wrap the sync versions, which also enables proper co-op blocking.
 """
 from __future__ import annotations
-from dataclasses import dataclass, field
+from dataclasses import field
+from inspect import isawaitable
+from itertools import chain
+from operator import attrgetter, itemgetter
 from typing import (
     Type,
     Optional,
@@ -21,6 +24,7 @@ from typing import (
     Tuple,
 )
 
+from wrangle_pypes.pipeline import slotted_dataclass
 from .pipeline import AsyncTransformation, AsyncPipeline
 
 __all__ = (
@@ -50,180 +54,275 @@ K = TypeVar("K")
 V = TypeVar("V")
 
 
-@dataclass
+@slotted_dataclass
 class Id(AsyncTransformation, Generic[V]):
-    async def apply(self, pipeline: AsyncPipeline, data: V, *args, **kwargs) -> V:
+    def apply(self, pipeline: AsyncPipeline, data: V, *args, **kwargs) -> V:
         return data
 
 
-@dataclass
+@slotted_dataclass
 class Constant(AsyncTransformation, Generic[V]):
     value: V
 
-    async def apply(self, pipeline: AsyncPipeline, data: Any, *args, **kwargs) -> V:
+    def apply(self, pipeline: AsyncPipeline, data: Any, *args, **kwargs) -> V:
         return self.value
 
 
-@dataclass
+@slotted_dataclass
 class Custom(AsyncTransformation, Generic[K, V]):
     func: Callable[[K], V]
 
-    async def apply(self, pipeline: AsyncPipeline, data: K, *args, **kwargs) -> V:
+    def apply(self, pipeline: AsyncPipeline, data: K, *args, **kwargs) -> V:
         return self.func(data)  # type: ignore
 
 
-@dataclass
+@slotted_dataclass
 class Default(AsyncTransformation, Generic[V, K]):
     value: V
     cond: Callable[[K], bool] = bool
 
-    async def apply(self, pipeline: AsyncPipeline, data: K, *args, **kwargs) -> V:
+    def apply(self, pipeline: AsyncPipeline, data: K, *args, **kwargs) -> V:
         return data if self.cond(data) else self.value  # type: ignore
 
 
-@dataclass
+@slotted_dataclass
 class Get(AsyncTransformation, Generic[K]):
     key: K
     default: Any = None
+    _get: Callable[[Any], Any] = field(init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name == "key":
+            object.__setattr__(self, "_get", itemgetter(value))
 
     @overload
-    async def apply(self, pipeline, data: Mapping[K, V], *args, **kwargs) -> V:
+    def apply(self, pipeline, data: Mapping[K, V], *args, **kwargs) -> V:
         ...
 
     @overload
-    async def apply(self, pipeline, data: Sequence[V], *args, **kwargs) -> V:
+    def apply(self, pipeline, data: Sequence[V], *args, **kwargs) -> V:
         ...
 
-    async def apply(self, pipeline: AsyncPipeline, data, *args, **kwargs):
+    def apply(self, pipeline: AsyncPipeline, data, *args, **kwargs):
         try:
-            return data[self.key]
+            return self._get(data)
         except (IndexError, KeyError):
             if self.default is not None:
                 return self.default
             raise
 
 
-@dataclass
+@slotted_dataclass
 class Attr(AsyncTransformation):
     attr: str
+    _get: Callable[[Any], Any] = field(init=False, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name == "attr":
+            # attrgetter would follow dots, getattr takes the name literally
+            getter = self._getattr if "." in value else attrgetter(value)
+            object.__setattr__(self, "_get", getter)
 
-    async def apply(self, pipeline: AsyncPipeline, data: Any, *args, **kwargs) -> Any:
+    def _getattr(self, data: Any) -> Any:
         return getattr(data, self.attr)
 
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # `_get` may be bound to this instance, so it is rebuilt instead
+        return None, {"attr": self.attr}
+
+    def apply(self, pipeline: AsyncPipeline, data: Any, *args, **kwargs) -> Any:
+        return self._get(data)
+
 
-@dataclass
+@slotted_dataclass
 class Filter(AsyncTransformation, Generic[V]):
     func: Callable[[V], bool]
 
-    async def apply(
+    def apply(
         self, pipeline: AsyncPipeline, data: Iterable[V], *args, **kwargs
     ) -> List[V]:
-        return [val for val in data if self.func(data)]  # type: ignore
+        return list(filter(self.func, data))
 
 
-@dataclass
+@slotted_dataclass
 class Map(AsyncTransformation, Generic[K, V]):
     func: Callable[[V], K]
 
-    async def apply(
+    def apply(
         self, pipeline: AsyncPipeline, data: Iterable[V], *args, **kwargs
     ) -> List[K]:
-        return [self.func(val) for val in data]  # type: ignore
+        return list(map(self.func, data))  # type: ignore
 
 
-@dataclass
+@slotted_dataclass
 class ForEach(AsyncTransformation):
     transformation: AsyncTransformation
 
     async def apply(
         self, pipeline: AsyncPipeline, data: Sequence[Any], *args, **kwargs
     ) -> List:
+        transformation = self.transformation
+        if not transformation._is_async:
+            values = [
+                transformation.call(pipeline, datapoint, *args, **kwargs)
+                for datapoint in data
+            ]
+            if not any(map(isawaitable, values)):
+                return values
+            return [await value if isawaitable(value) else value for value in values]
         return [
-            self.transformation(pipeline, datapoint, *args, **kwargs)
+            await transformation.call(pipeline, datapoint, *args, **kwargs)
             for datapoint in data
         ]
 
 
-@dataclass
+@slotted_dataclass
 class Flatten(AsyncTransformation):
     depth: int = 1
 
-    async def apply(
+    def apply(
         self, pipeline: AsyncPipeline, data: Sequence[Sequence], *args, **kwargs
     ) -> List:
         result = data
         for _ in range(self.depth):
-            result = sum(result, [])
+            result = list(chain.from_iterable(result))
         return result  # type: ignore
 
 
-@dataclass
+@slotted_dataclass
 class Gather(AsyncTransformation, Generic[K]):
     keys: Tuple[K]
-
-    async def apply(
+    _getter: Callable[[Mapping[K, V]], Tuple[V, ...]] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name == "keys":
+            getter: Callable[[Mapping[K, V]], Tuple[V, ...]]
+            if len(value) == 1:
+                getter = self._gather_one
+            elif value:
+                getter = itemgetter(*value)
+            else:
+                getter = self._gather_none
+            object.__setattr__(self, "_getter", getter)
+
+    def _gather_one(self, data: Mapping[K, V]) -> Tuple[V, ...]:
+        return (data[self.keys[0]],)
+
+    def _gather_none(self, data: Mapping[K, V]) -> Tuple[V, ...]:
+        return ()
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # `_getter` may be bound to this instance, so it is rebuilt instead
+        return None, {"keys": self.keys}
+
+    def apply(
         self, pipeline: AsyncPipeline, data: Mapping[K, V], *args, **kwargs
     ) -> Dict[K, V]:
-        return {key: data[key] for key in self.keys}
+        return dict(zip(self.keys, self._getter(data)))
 
 
-@dataclass
+@slotted_dataclass
 class FoldInKeys(AsyncTransformation):
     name: str
 
-    async def apply(
+    def apply(
         self, pipeline: AsyncPipeline, data: Mapping[Any, Mapping], *args, **kwargs
     ) -> List[Mapping]:
-        return [{self.name: key, **datapoint} for key, datapoint in data.items()]
+        name = self.name
+        result: List[Mapping] = []
+        for key, datapoint in data.items():
+            folded = dict(datapoint)
+            folded.setdefault(name, key)
+            result.append(folded)
+        return result
 
 
-@dataclass
+@slotted_dataclass
 class FoldInValue(AsyncTransformation):
     key: str
     name: str
 
-    async def apply(
+    def apply(
         self, pipeline: AsyncPipeline, data: Mapping[Any, Any], *args, **kwargs
     ) -> Mapping:
-        return {
-            key: {self.name: data[self.key], **datapoint}
-            for key, datapoint in data.items()
-            if key != self.key
-        }
-
-
-@dataclass
+        name, value_key = self.name, self.key
+        if len(data) == (value_key in data):
+            return {}  # nothing to fold into, so the value may be missing
+        value = data[value_key]
+        result = {}
+        for key, datapoint in data.items():
+            if key != value_key:
+                folded = dict(datapoint)
+                folded.setdefault(name, value)
+                result[key] = folded
+        return result
+
+
+@slotted_dataclass
 class GetKeys(AsyncTransformation):
-    async def apply(
+    def apply(
         self, pipeline: AsyncPipeline, data: Mapping[K, V], *args, **kwargs
     ) -> List[K]:
         return list(data.keys())
 
 
-@dataclass
+@slotted_dataclass
 class GetValues(AsyncTransformation):
-    async def apply(
+    def apply(
         self, pipeline: AsyncPipeline, data: Mapping[K, V], *args, **kwargs
     ) -> List[V]:
         return list(data.values())
 
 
-@dataclass
+@slotted_dataclass
 class If(AsyncTransformation, Generic[V]):
     cond: Callable[[V], bool]
     then: AsyncTransformation
     else_: Optional[AsyncTransformation] = None
+    _run: Callable[[AsyncPipeline, V, Tuple, Dict[str, Any]], Any] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name == "else_":
+            run = self._run_then if value is None else self._run_either
+            object.__setattr__(self, "_run", run)
+
+    async def _run_then(
+        self, pipeline: AsyncPipeline, data: V, args: Tuple, kwargs: Dict
+    ) -> Any:
+        if not self.cond(data):
+            return None
+        then = self.then
+        value = then.call(pipeline, data, *args, **kwargs)
+        if then._is_async or isawaitable(value):
+            value = await value
+        return value
+
+    async def _run_either(
+        self, pipeline: AsyncPipeline, data: V, args: Tuple, kwargs: Dict
+    ) -> Any:
+        branch = self.then if self.cond(data) else self.else_
+        value = branch.call(pipeline, data, *args, **kwargs)  # type: ignore
+        if branch._is_async or isawaitable(value):  # type: ignore
+            value = await value
+        return value
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # `_run` is bound to this instance, so it is rebuilt instead
+        return None, {"cond": self.cond, "then": self.then, "else_": self.else_}
 
     async def apply(self, pipeline: AsyncPipeline, data: V, *args, **kwargs) -> Any:
-        if self.cond(data):  # type: ignore
-            return self.then(pipeline, data, *args, **kwargs)
-        elif self.else_ is not None:
-            return self.else_(pipeline, data, *args, **kwargs)
-        else:
-            return None
+        return await self._run(pipeline, data, args, kwargs)
 
 
-@dataclass
+@slotted_dataclass
 class Create(AsyncTransformation, Generic[V]):
     model: Type[V]
 
@@ -231,40 +330,40 @@ class Create(AsyncTransformation, Generic[V]):
         return await pipeline.create(self.model, data, *args, **kwargs)
 
 
-@dataclass
+@slotted_dataclass
 class CreateMultiple(AsyncTransformation, Generic[V]):
     model: Type[V]
 
     async def apply(
         self, pipeline: AsyncPipeline, data: Sequence[Any], *args, **kwargs
     ) -> List[V]:
-        return list(await pipeline.create_multiple(self.model, data, *args, **kwargs))
+        return await pipeline.create_multiple(self.model, data, *args, **kwargs)
 
 
-@dataclass
+@slotted_dataclass
 class GetOrCreate(AsyncTransformation, Generic[V]):
     model: Type[V]
     match_targets: Optional[List[str]] = None
+    cache: bool = False
 
     async def apply(
         self, pipeline: AsyncPipeline, data: Any, *args, **kwargs
     ) -> Tuple[V, bool]:
         return await pipeline.get_or_create(
-            self.model, data, self.match_targets, *args, **kwargs
+            self.model, data, self.match_targets, *args, _cache=self.cache, **kwargs
         )
 
 
-@dataclass
+@slotted_dataclass
 class GetOrCreateMultiple(AsyncTransformation, Generic[V]):
     model: Type[V]
     match_targets: Optional[List[str]] = None
+    cache: bool = False
 
     async def apply(
         self, pipeline: AsyncPipeline, data: Sequence[Any], *args, **kwargs
     ) -> List[Tuple[V, bool]]:
-        return list(
-            await pipeline.get_or_create_multiple(
-                self.model, data, self.match_targets, *args, **kwargs
-            )
+        return await pipeline.get_or_create_multiple(
+            self.model, data, self.match_targets, *args, _cache=self.cache, **kwargs
         )
 
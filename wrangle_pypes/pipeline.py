@@ -1,17 +1,24 @@
 from __future__ import annotations
-from dataclasses import dataclass, field, fields
+import sys
+from collections import OrderedDict
+from dataclasses import MISSING, Field, dataclass, field, fields
+from types import MappingProxyType
 from typing import (
+    TYPE_CHECKING,
     Dict,
     Type,
     Generic,
     TypeVar,
     Any,
+    Mapping,
     Sequence,
     Iterator,
     List,
     Tuple,
+    FrozenSet,
     Optional,
     Callable,
+    NoReturn,
 )
 
 
@@ -25,12 +32,89 @@ class TransformationException(Exception):
     ...
 
 
+def _reraise_tf(model: Type, field_name: str, e: TransformationException) -> NoReturn:
+    """Re-raise a transformation's error as its original type, naming the field.
+
+    Kept out of the build loops so their bodies stay small on the happy path.
+    """
+    e_type, transformation, *e_args = e.args
+    raise e_type(
+        f"failed @ {model.__name__}.{field_name}: {transformation.__name__}: {e_args[0]}",
+        *e_args[1:],
+    )
+
+
+if TYPE_CHECKING:
+    slotted_dataclass = dataclass
+else:
+
+    def slotted_dataclass(cls):
+        """Turn `cls` into a dataclass storing its fields in `__slots__`."""
+        if sys.version_info >= (3, 10):
+            return dataclass(slots=True)(cls)
+        # __init__ leaves defaults of init=False fields to class attributes,
+        # which the slots replace, so have it set them through a factory
+        for value in list(vars(cls).values()):
+            if isinstance(value, Field) and not value.init:
+                if value.default is not MISSING:
+                    value.default_factory = lambda default=value.default: default
+                    value.default = MISSING
+        cls = dataclass(cls)
+        inherited = {
+            name for base in cls.__mro__[1:] for name in getattr(base, "__slots__", ())
+        }
+        namespace = dict(cls.__dict__)
+        namespace["__slots__"] = tuple(
+            f.name for f in fields(cls) if f.name not in inherited
+        )
+        for name in namespace["__slots__"]:
+            namespace.pop(name, None)
+        namespace.pop("__dict__", None)
+        namespace.pop("__weakref__", None)
+        slotted = type(cls)(cls.__name__, cls.__bases__, namespace)
+        slotted.__qualname__ = cls.__qualname__
+        return slotted
+
+
 @dataclass
 class Pipeline(Generic[M]):
-    transformations: Dict[Type[M], Dict[str, Transformation]] = field(
+    transformations: Dict[Type[M], Mapping[str, Transformation]] = field(
         default_factory=dict
     )
     lookup: Optional[Callable[[Type[M], Dict[str, Any]], M]] = None
+    cache_size: int = 100
+    _compiled: Dict[
+        Type[M],
+        Tuple[Mapping[str, Transformation], Tuple[Tuple[str, Transformation], ...]],
+    ] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _lookup_cache: OrderedDict[Tuple[Type[M], FrozenSet[Tuple[str, Any]]], M] = field(
+        default_factory=OrderedDict, init=False, repr=False, compare=False
+    )
+    _builders: Dict[
+        Type[M],
+        Tuple[
+            Mapping[str, Transformation],
+            Callable[[Pipeline, Any], Optional[Dict[str, Any]]],
+        ],
+    ] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        transformations, self.transformations = self.transformations, {}
+        for model, model_transformations in transformations.items():
+            self.register(model, model_transformations)
+
+    def register(self, model: Type[M], transformations: Mapping[str, Transformation]):
+        """Register the transformations building given model, replacing prior ones.
+
+        They are stored as a read-only copy, so they can only be changed by
+        registering them again.
+
+        :param model: model to register the transformations for
+        :param transformations: transformations building each kwarg of the model
+        """
+        source = self.transformations[model] = MappingProxyType(dict(transformations))
+        self._compiled[model] = source, tuple(source.items())
+        self._builders.pop(model, None)
 
     def create(self, model: Type[M], data: Any, *args, **kwargs) -> M:
         """Build a single instance of given model.
@@ -38,7 +122,9 @@ class Pipeline(Generic[M]):
         :param model: model to build
         :param data: data to build instance from
         """
-        return model(**self.build_kwargs(model, data, *args, **kwargs))  # type: ignore
+        if args or kwargs:
+            return model(**self.build_kwargs(model, data, *args, **kwargs))  # type: ignore
+        return model(**self._build_kwargs_fast(model, data))  # type: ignore
 
     def create_multiple(
         self, model: Type[M], data: Sequence[Any], *args, **kwargs
@@ -56,6 +142,7 @@ class Pipeline(Generic[M]):
         data: Any,
         *args,
         match_targets: Optional[List[str]] = None,
+        _cache: bool = False,
         **kwargs,
     ) -> Tuple[M, bool]:
         """Get a single instance matching given match targets or create it.
@@ -63,6 +150,8 @@ class Pipeline(Generic[M]):
         :param model: model to get or create the instance for
         :param data: data to get or create the instance from
         :param match_targets: fields to use for matching the data to the DB, default to None
+        :param _cache: reuse instances previously got or created for the same
+            match, keeping the last `cache_size` ones, defaults to False
         """
         lookup = kwargs.get("lookup") or getattr(self, "lookup")
         if lookup is None:
@@ -75,12 +164,23 @@ class Pipeline(Generic[M]):
                 key: self.build_kwarg(model, key, data, *args, **kwargs)
                 for key in match_targets
             }
+        cache_key = self._cache_key(model, lookup_kwargs) if _cache else None
+        if cache_key is not None:
+            instance = self._cache_get(cache_key)
+            if instance is not None:
+                return instance, False
+
         instance = lookup(model, lookup_kwargs)
-        if not instance:
-            if not match_targets:
+        created = not instance
+        if created:
+            if match_targets is None:
+                build_kwargs = lookup_kwargs
+            else:
                 build_kwargs = self.build_kwargs(model, data, *args, **kwargs)
-            return model(**build_kwargs), True  # type: ignore
-        return instance, False
+            instance = model(**build_kwargs)  # type: ignore
+        if cache_key is not None:
+            self._cache_put(cache_key, instance)
+        return instance, created
 
     def get_or_create_multiple(
         self,
@@ -103,6 +203,39 @@ class Pipeline(Generic[M]):
             for datapoint in data
         )
 
+    def clear_cache(self):
+        """Forget all instances cached by `get_or_create`."""
+        self._lookup_cache.clear()
+
+    def _cache_key(
+        self, model: Type[M], lookup_kwargs: Dict[str, Any]
+    ) -> Optional[Tuple[Type[M], FrozenSet[Tuple[str, Any]]]]:
+        """Build the lookup cache key, None if any lookup value is unhashable.
+
+        :param model: model being looked up
+        :param lookup_kwargs: kwargs used for the lookup
+        """
+        try:
+            return model, frozenset(lookup_kwargs.items())
+        except TypeError:
+            return None
+
+    def _cache_get(
+        self, key: Tuple[Type[M], FrozenSet[Tuple[str, Any]]]
+    ) -> Optional[M]:
+        instance = self._lookup_cache.get(key)
+        if instance is not None:
+            self._lookup_cache.move_to_end(key)
+        return instance
+
+    def _cache_put(
+        self, key: Tuple[Type[M], FrozenSet[Tuple[str, Any]]], instance: Any
+    ):
+        self._lookup_cache[key] = instance
+        self._lookup_cache.move_to_end(key)
+        if len(self._lookup_cache) > self.cache_size:
+            self._lookup_cache.popitem(last=False)
+
     def build_kwargs(
         self, model: Type[M], data: Any, *args, **kwargs
     ) -> Dict[str, Any]:
@@ -111,10 +244,91 @@ class Pipeline(Generic[M]):
         :param model: model to build kwargs for
         :param data: data to build kwargs from
         """
-        return {
-            name: self.build_kwarg(model, name, data, *args, **kwargs)
-            for name, transformation in self.transformations[model].items()
+        kwargs_ = {}
+        try:
+            for name, transformation in self._get_compiled(model):
+                kwargs_[name] = transformation(self, data, *args, **kwargs)
+        except TransformationException as e:
+            _reraise_tf(model, name, e)
+        return kwargs_
+
+    def _build_kwargs_fast(self, model: Type[M], data: Any) -> Dict[str, Any]:
+        """Build kwargs without extra args, see `Transformation.apply_fast`.
+
+        :param model: model to build kwargs for
+        :param data: data to build kwargs from
+        """
+        # the source check catches `transformations` entries replaced directly
+        builder = self._builders.get(model)
+        kwargs_ = None
+        if builder is not None and builder[0] is self.transformations[model]:
+            kwargs_ = builder[1](self, data)
+        if kwargs_ is None:
+            kwargs_ = self.compile(model)(self, data)
+        return kwargs_  # type: ignore
+
+    def compile(
+        self, model: Type[M]
+    ) -> Callable[[Pipeline, Any], Optional[Dict[str, Any]]]:
+        """Generate the function building kwargs for given model without extra args.
+
+        Transformations are inlined as far as they support it, see
+        `Transformation.inline`, so call `invalidate` after changing any of
+        them in place. Chains extended with `|` or reassigned fields of
+        `Chain`, `Get` and `Attr` are detected: the function then returns None
+        and the model is compiled again on next use.
+        Replaced `transformations` entries are detected as well.
+
+        :param model: model to compile the build for
+        """
+        source = self.transformations[model]
+        build = BuildCompiler(model).compile(self._get_compiled(model))
+        self._builders[model] = source, build
+        return build
+
+    def _get_compiled(self, model: Type[M]) -> Tuple[Tuple[str, Transformation], ...]:
+        """Get the cached (name, transformation) pairs of given model.
+
+        :param model: model to get the transformations for
+        """
+        source = self.transformations[model]
+        compiled = self._compiled.get(model)
+        if compiled is None or compiled[0] is not source:
+            compiled = self._compiled[model] = source, tuple(source.items())
+        return compiled[1]
+
+    def invalidate(self, model: Optional[Type[M]] = None):
+        """Drop cached transformations, e.g. after changing one in place.
+
+        :param model: model to invalidate, defaults to all models
+        """
+        if model is None:
+            self._compiled.clear()
+            self._builders.clear()
+        else:
+            self._compiled.pop(model, None)
+            self._builders.pop(model, None)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # caches are per pipeline, so copies start with fresh ones, and
+        # read-only views can't be pickled, so they are registered again
+        state = {
+            name: value
+            for name, value in self.__dict__.items()
+            if name not in ("_compiled", "_lookup_cache", "_builders")
+        }
+        state["transformations"] = {
+            model: dict(transformations)
+            for model, transformations in self.transformations.items()
         }
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._compiled = {}
+        self._lookup_cache = OrderedDict()
+        self._builders = {}
+        self.__post_init__()
 
     def build_kwarg(
         self, model: Type[M], kwarg: str, data: Any, *args, **kwargs
@@ -128,14 +342,22 @@ class Pipeline(Generic[M]):
         try:
             return self.transformations[model][kwarg](self, data, *args, **kwargs)
         except TransformationException as e:
-            e_type, transformation, *e_args = e.args
-            raise e_type(
-                f"failed @ {model.__name__}.{kwarg}: {transformation.__name__}: {e_args[0]}",
-                *e_args[1:],
-            )
+            _reraise_tf(model, kwarg, e)
 
 
 class Transformation:
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # a parent's specialised `apply_fast` or `inline` would bypass an
+        # overriding `apply`, and its `inline` an overriding `apply_fast`
+        overrides = set(vars(cls))
+        if "apply" in overrides and "apply_fast" not in overrides:
+            cls.apply_fast = Transformation.apply_fast  # type: ignore
+        if overrides & {"apply", "apply_fast"} and "inline" not in overrides:
+            cls.inline = Transformation.inline  # type: ignore
+
     def apply(self, pipeline: Pipeline, data: Any, *args, **kwargs) -> Any:
         raise NotImplementedError
 
@@ -147,13 +369,49 @@ class Transformation:
                 raise e
             raise TransformationException(type(e), type(self), *e.args)
 
+    def apply_fast(self, pipeline: Pipeline, data: Any) -> Any:
+        """`apply` without extra args, used whenever none were passed.
+
+        Override this if the transformation can skip forwarding them.
+        """
+        return self.apply(pipeline, data)
+
+    def call_fast(self, pipeline: Pipeline, data: Any) -> Any:
+        try:
+            return self.apply_fast(pipeline, data)
+        except Exception as e:
+            if isinstance(e, TransformationException):
+                raise e
+            raise TransformationException(type(e), type(self), *e.args)
+
+    def inline(self, compiler: BuildCompiler, value: str) -> str:
+        """Emit code applying this transformation to the variable `value`.
+
+        Returns the expression holding the result. By default this calls
+        `apply_fast`, override it to emit something cheaper.
+        """
+        apply_fast = compiler.bind(self.apply_fast)
+        return compiler.step(self, f"{apply_fast}(pipeline, {value})")
+
     def __or__(self, other: Transformation) -> Chain:
         return Chain() | self | other
 
 
-@dataclass
+@slotted_dataclass
 class Chain(Transformation):
-    transformations: List[Transformation] = field(init=False, default_factory=list)
+    transformations: Tuple[Transformation, ...] = field(init=False, default=())
+    _run: Optional[Callable[[Pipeline, Any], Any]] = field(
+        init=False, default=None, repr=False, compare=False
+    )
+    _version: int = field(init=False, default=0, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name == "transformations":
+            # being a tuple, it is reassigned on every change, so anything
+            # compiled from the previous one is dropped or guarded against here
+            object.__setattr__(self, "_run", None)
+            object.__setattr__(self, "_version", getattr(self, "_version", 0) + 1)
 
     def apply(self, pipeline: Pipeline, data: Any, *args, **kwargs) -> Any:
         val = data
@@ -161,6 +419,163 @@ class Chain(Transformation):
             val = transformation(pipeline, val, *args, **kwargs)
         return val
 
+    def apply_fast(self, pipeline: Pipeline, data: Any) -> Any:
+        return (self._run or self._compile())(pipeline, data)
+
+    def _compile(self) -> Callable[[Pipeline, Any], Any]:
+        """Generate a straight-line `apply_fast` for the current transformations.
+
+        Each step's `apply_fast` is called directly, wrapping errors the same
+        way `call_fast` would, without a frame per step for doing so.
+        """
+        namespace: Dict[str, Any] = {
+            "TransformationException": TransformationException,
+            "types": tuple(type(t) for t in self.transformations),
+        }
+        lines = ["def run(pipeline, val):", "    try:"]
+        for i, transformation in enumerate(self.transformations):
+            namespace[f"apply_{i}"] = transformation.apply_fast
+            lines.append(f"        step = {i}")
+            lines.append(f"        val = apply_{i}(pipeline, val)")
+        if not self.transformations:
+            lines.append("        pass")
+        lines += [
+            "    except TransformationException:",
+            "        raise",
+            "    except Exception as e:",
+            "        raise TransformationException(type(e), types[step], *e.args)",
+            "    return val",
+        ]
+        exec("\n".join(lines), namespace)
+        self._run = namespace["run"]
+        return self._run  # type: ignore
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # the compiled `_run` is exec'd code, so it is rebuilt on first use
+        return None, {
+            "transformations": self.transformations,
+            "_run": None,
+            "_version": self._version,
+        }
+
+    def inline(self, compiler: BuildCompiler, value: str) -> str:
+        compiler.guard(f"{compiler.bind(self)}._version == {self._version}")
+        for transformation in self.transformations:
+            value = transformation.inline(compiler, value)
+        return value
+
     def __or__(self, other: Transformation) -> Chain:
-        self.transformations.append(other)
+        self.transformations = (*self.transformations, other)
         return self
+
+
+class BuildCompiler:
+    """Generates a single function building all kwargs of a model.
+
+    Transformations add to it through `Transformation.inline`. Every step
+    that may fail is numbered, so errors are reported for the same field
+    and transformation as by `Pipeline.build_kwargs`. Pure steps are only
+    emitted once, e.g. `Get("user")` shared by several kwargs. Guards are
+    checked before anything is built; if one fails, the function returns
+    None instead so it can be compiled again.
+    """
+
+    def __init__(self, model: Type):
+        self.model = model
+        self.namespace: Dict[str, Any] = {
+            "TransformationException": TransformationException
+        }
+        self.bound: Dict[int, str] = {}
+        self.keys: Dict[Tuple[Type, Any], str] = {}
+        self.pure: Dict[str, str] = {}
+        self.lines: List[str] = []
+        self.fields: List[str] = []
+        self.types: List[Type[Transformation]] = []
+        self.guards: List[str] = []
+        self.field = ""
+
+    def bind(self, value: Any) -> str:
+        """Make `value` available to the generated code, returning its name."""
+        name = self.bound.get(id(value))
+        if name is None:
+            name = self.bound[id(value)] = f"c{len(self.namespace)}"
+            self.namespace[name] = value
+        return name
+
+    def bind_key(self, key: Any) -> str:
+        """Like `bind`, but equal keys share a name, returning it.
+
+        This lets pure steps subscripting equal keys be emitted once. Only use
+        it where equal values are interchangeable, e.g. not for constants,
+        as `-0.0` and `0.0` or `Decimal("1.0")` and `Decimal("1.00")` differ.
+        """
+        try:
+            return self.keys[type(key), key]
+        except KeyError:
+            name = self.keys[type(key), key] = self.bind(key)
+            return name
+        except TypeError:
+            return self.bind(key)
+
+    def guard(self, condition: str):
+        """Only run the generated code while `condition` holds, e.g. a version."""
+        if condition not in self.guards:
+            self.guards.append(condition)
+
+    def step(
+        self, transformation: Transformation, expression: str, pure: bool = False
+    ) -> str:
+        """Emit a step of `transformation` computing `expression`.
+
+        Returns the variable holding the result. If `pure` is set, the
+        result of an identical earlier step is reused instead, so only set it
+        for steps free of side effects, e.g. not attribute access, which may
+        run properties or `__getattr__`.
+        """
+        if pure and expression in self.pure:
+            return self.pure[expression]
+        step = len(self.types)
+        self.fields.append(self.field)
+        self.types.append(type(transformation))
+        self.lines.append(f"step = {step}")
+        self.lines.append(f"v{step} = {expression}")
+        if pure:
+            self.pure[expression] = f"v{step}"
+        return f"v{step}"
+
+    def compile(
+        self, transformations: Sequence[Tuple[str, Transformation]]
+    ) -> Callable[[Pipeline, Any], Optional[Dict[str, Any]]]:
+        """Generate the build function for the given (name, transformation) pairs.
+
+        :param transformations: transformations building each kwarg
+        """
+        kwargs = []
+        for name, transformation in transformations:
+            self.field = name
+            kwargs.append(f"{self.bind(name)}: {transformation.inline(self, 'data')}")
+        self.namespace.update(
+            reraise=_reraise_tf, model=self.model, fields=self.fields, types=self.types
+        )
+        guards = []
+        if self.guards:
+            guards = [
+                f"    if not ({' and '.join(self.guards)}):",
+                "        return None",
+            ]
+        source = "\n".join(
+            [
+                "def build(pipeline, data):",
+                *guards,
+                "    try:",
+                *(f"        {line}" for line in self.lines),
+                f"        return {{{', '.join(kwargs)}}}",
+                "    except TransformationException as e:",
+                "        reraise(model, fields[step], e)",
+                "    except Exception as e:",
+                "        e = TransformationException(type(e), types[step], *e.args)",
+                "        reraise(model, fields[step], e)",
+            ]
+        )
+        exec(source, self.namespace)
+        return self.namespace["build"]
@@ -1,5 +1,8 @@
 from __future__ import annotations
-from dataclasses import dataclass, field
+from dataclasses import field
+from itertools import chain
+from keyword import iskeyword
+from operator import attrgetter, itemgetter
 from typing import (
     Type,
     Optional,
@@ -17,7 +20,7 @@ from typing import (
     Tuple,
 )
 
-from .pipeline import Transformation, Pipeline
+from .pipeline import Transformation, Pipeline, BuildCompiler, slotted_dataclass
 
 __all__ = (
     "Id",
@@ -47,37 +50,50 @@ K = TypeVar("K")
 V = TypeVar("V")
 
 
-@dataclass
+@slotted_dataclass
 class Id(Transformation, Generic[V]):
     def apply(self, pipeline: Pipeline, data: V, *args, **kwargs) -> V:
         return data
 
+    def inline(self, compiler: BuildCompiler, value: str) -> str:
+        return value
 
-@dataclass
+
+@slotted_dataclass
 class Constant(Transformation, Generic[V]):
     value: V
 
     def apply(self, pipeline: Pipeline, data: Any, *args, **kwargs) -> V:
         return self.value
 
+    def inline(self, compiler: BuildCompiler, value: str) -> str:
+        return compiler.bind(self.value)
+
 
-@dataclass
+@slotted_dataclass
 class Cast(Transformation, Generic[K, V]):
     func: Callable[[K], V]
 
     def apply(self, pipeline: Pipeline, data: K, *args, **kwargs) -> V:
         return self.func(data)  # type: ignore
 
+    def inline(self, compiler: BuildCompiler, value: str) -> str:
+        return compiler.step(self, f"{compiler.bind(self.func)}({value})")
 
-@dataclass
+
+@slotted_dataclass
 class Custom(Transformation, Generic[K, V]):
     func: Callable[[Pipeline, K, Tuple, Dict[str, Any]], V]
 
     def apply(self, pipeline: Pipeline, data: K, *args, **kwargs) -> V:
         return self.func(pipeline, data, args, kwargs)  # type: ignore
 
+    def inline(self, compiler: BuildCompiler, value: str) -> str:
+        func = compiler.bind(self.func)
+        return compiler.step(self, f"{func}(pipeline, {value}, (), {{}})")
+
 
-@dataclass
+@slotted_dataclass
 class Default(Transformation, Generic[V, K]):
     value: V
     cond: Callable[[K], bool] = bool
@@ -86,10 +102,20 @@ class Default(Transformation, Generic[V, K]):
         return data if self.cond(data) else self.value  # type: ignore
 
 
-@dataclass
+@slotted_dataclass
 class Get(Transformation, Generic[K]):
     key: K
     default: Any = None
+    _get: Callable[[Any], Any] = field(init=False, repr=False, compare=False)
+    _version: int = field(init=False, default=0, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name == "key":
+            object.__setattr__(self, "_get", itemgetter(value))
+        if name in ("key", "default"):
+            # builds inlining this check `_version`, see `inline`
+            object.__setattr__(self, "_version", getattr(self, "_version", 0) + 1)
 
     @overload
     def apply(self, pipeline, data: Mapping[K, V], *args, **kwargs) -> V:
@@ -101,49 +127,83 @@ class Get(Transformation, Generic[K]):
 
     def apply(self, pipeline: Pipeline, data, *args, **kwargs):
         try:
-            return data[self.key]
+            return self._get(data)
         except (IndexError, KeyError):
             if self.default is not None:
                 return self.default
             raise
 
+    def inline(self, compiler: BuildCompiler, value: str) -> str:
+        if self.default is not None:
+            return Transformation.inline(self, compiler, value)
+        compiler.guard(f"{compiler.bind(self)}._version == {self._version}")
+        return compiler.step(self, f"{value}[{compiler.bind_key(self.key)}]", pure=True)
+
 
-@dataclass
+@slotted_dataclass
 class Attr(Transformation):
     attr: str
+    _get: Callable[[Any], Any] = field(init=False, repr=False, compare=False)
+    _version: int = field(init=False, default=0, repr=False, compare=False)
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name == "attr":
+            # attrgetter would follow dots, getattr takes the name literally
+            getter = self._getattr if "." in value else attrgetter(value)
+            object.__setattr__(self, "_get", getter)
+            # builds inlining this check `_version`, see `inline`
+            object.__setattr__(self, "_version", getattr(self, "_version", 0) + 1)
+
+    def _getattr(self, data: Any) -> Any:
+        return getattr(data, self.attr)
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # `_get` may be bound to this instance, so it is rebuilt instead
+        return None, {"attr": self.attr}
 
     def apply(self, pipeline: Pipeline, data: Any, *args, **kwargs) -> Any:
-        return getattr(data, self.attr)
+        return self._get(data)
 
+    def inline(self, compiler: BuildCompiler, value: str) -> str:
+        if not self.attr.isidentifier() or iskeyword(self.attr):
+            return Transformation.inline(self, compiler, value)
+        compiler.guard(f"{compiler.bind(self)}._version == {self._version}")
+        return compiler.step(self, f"{value}.{self.attr}")
 
-@dataclass
+
+@slotted_dataclass
 class Filter(Transformation, Generic[V]):
     func: Callable[[V], bool]
 
     def apply(self, pipeline: Pipeline, data: Iterable[V], *args, **kwargs) -> List[V]:
-        return [val for val in data if self.func(data)]  # type: ignore
+        return list(filter(self.func, data))
 
 
-@dataclass
+@slotted_dataclass
 class Map(Transformation, Generic[K, V]):
     func: Callable[[V], K]
 
     def apply(self, pipeline: Pipeline, data: Iterable[V], *args, **kwargs) -> List[K]:
-        return [self.func(val) for val in data]  # type: ignore
+        return list(map(self.func, data))  # type: ignore
 
 
-@dataclass
+@slotted_dataclass
 class ForEach(Transformation):
     transformation: Transformation
 
     def apply(self, pipeline: Pipeline, data: Sequence[Any], *args, **kwargs) -> List:
+        transformation = self.transformation
         return [
-            self.transformation(pipeline, datapoint, *args, **kwargs)
-            for datapoint in data
+            transformation(pipeline, datapoint, *args, **kwargs) for datapoint in data
         ]
 
+    def apply_fast(self, pipeline: Pipeline, data: Sequence[Any]) -> List:
+        call_fast = self.transformation.call_fast
+        return [call_fast(pipeline, datapoint) for datapoint in data]
+
 
-@dataclass
+@slotted_dataclass
 class Flatten(Transformation):
     depth: int = 1
 
@@ -152,31 +212,62 @@ class Flatten(Transformation):
     ) -> List:
         result = data
         for _ in range(self.depth):
-            result = sum(result, [])
+            result = list(chain.from_iterable(result))
         return result  # type: ignore
 
 
-@dataclass
+@slotted_dataclass
 class Gather(Transformation, Generic[K]):
     keys: Tuple[K]
+    _getter: Callable[[Mapping[K, V]], Tuple[V, ...]] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name == "keys":
+            getter: Callable[[Mapping[K, V]], Tuple[V, ...]]
+            if len(value) == 1:
+                getter = self._gather_one
+            elif value:
+                getter = itemgetter(*value)
+            else:
+                getter = self._gather_none
+            object.__setattr__(self, "_getter", getter)
+
+    def _gather_one(self, data: Mapping[K, V]) -> Tuple[V, ...]:
+        return (data[self.keys[0]],)
+
+    def _gather_none(self, data: Mapping[K, V]) -> Tuple[V, ...]:
+        return ()
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # `_getter` may be bound to this instance, so it is rebuilt instead
+        return None, {"keys": self.keys}
 
     def apply(
         self, pipeline: Pipeline, data: Mapping[K, V], *args, **kwargs
     ) -> Dict[K, V]:
-        return {key: data[key] for key in self.keys}
+        return dict(zip(self.keys, self._getter(data)))
 
 
-@dataclass
+@slotted_dataclass
 class FoldInKeys(Transformation):
     name: str
 
     def apply(
         self, pipeline: Pipeline, data: Mapping[Any, Mapping], *args, **kwargs
     ) -> List[Mapping]:
-        return [{self.name: key, **datapoint} for key, datapoint in data.items()]
+        name = self.name
+        result: List[Mapping] = []
+        for key, datapoint in data.items():
+            folded = dict(datapoint)
+            folded.setdefault(name, key)
+            result.append(folded)
+        return result
 
 
-@dataclass
+@slotted_dataclass
 class FoldInValue(Transformation):
     key: str
     name: str
@@ -184,14 +275,20 @@ class FoldInValue(Transformation):
     def apply(
         self, pipeline: Pipeline, data: Mapping[Any, Any], *args, **kwargs
     ) -> Mapping:
-        return {
-            key: {self.name: data[self.key], **datapoint}
-            for key, datapoint in data.items()
-            if key != self.key
-        }
-
-
-@dataclass
+        name, value_key = self.name, self.key
+        if len(data) == (value_key in data):
+            return {}  # nothing to fold into, so the value may be missing
+        value = data[value_key]
+        result = {}
+        for key, datapoint in data.items():
+            if key != value_key:
+                folded = dict(datapoint)
+                folded.setdefault(name, value)
+                result[key] = folded
+        return result
+
+
+@slotted_dataclass
 class GetKeys(Transformation):
     def apply(
         self, pipeline: Pipeline, data: Mapping[K, V], *args, **kwargs
@@ -199,7 +296,7 @@ class GetKeys(Transformation):
         return list(data.keys())
 
 
-@dataclass
+@slotted_dataclass
 class GetValues(Transformation):
     def apply(
         self, pipeline: Pipeline, data: Mapping[K, V], *args, **kwargs
@@ -207,22 +304,56 @@ class GetValues(Transformation):
         return list(data.values())
 
 
-@dataclass
+@slotted_dataclass
 class If(Transformation, Generic[V]):
     cond: Callable[[V], bool]
     then: Transformation
     else_: Optional[Transformation] = None
+    _run: Callable[[Pipeline, V, Tuple, Dict[str, Any]], Any] = field(
+        init=False, repr=False, compare=False
+    )
+    _run_fast: Callable[[Pipeline, V], Any] = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name == "else_":
+            if value is None:
+                object.__setattr__(self, "_run", self._run_then)
+                object.__setattr__(self, "_run_fast", self._run_fast_then)
+            else:
+                object.__setattr__(self, "_run", self._run_either)
+                object.__setattr__(self, "_run_fast", self._run_fast_either)
+
+    def _run_then(self, pipeline: Pipeline, data: V, args: Tuple, kwargs: Dict) -> Any:
+        return self.then(pipeline, data, *args, **kwargs) if self.cond(data) else None
+
+    def _run_either(
+        self, pipeline: Pipeline, data: V, args: Tuple, kwargs: Dict
+    ) -> Any:
+        branch = self.then if self.cond(data) else self.else_
+        return branch(pipeline, data, *args, **kwargs)  # type: ignore
+
+    def _run_fast_then(self, pipeline: Pipeline, data: V) -> Any:
+        return self.then.call_fast(pipeline, data) if self.cond(data) else None
+
+    def _run_fast_either(self, pipeline: Pipeline, data: V) -> Any:
+        branch = self.then if self.cond(data) else self.else_
+        return branch.call_fast(pipeline, data)  # type: ignore
+
+    def __getstate__(self) -> Tuple[None, Dict[str, Any]]:
+        # `_run` and `_run_fast` are bound to this instance, so they are rebuilt
+        return None, {"cond": self.cond, "then": self.then, "else_": self.else_}
 
     def apply(self, pipeline: Pipeline, data: V, *args, **kwargs) -> Any:
-        if self.cond(data):  # type: ignore
-            return self.then(pipeline, data, *args, **kwargs)
-        elif self.else_ is not None:
-            return self.else_(pipeline, data, *args, **kwargs)
-        else:
-            return None
+        return self._run(pipeline, data, args, kwargs)
+
+    def apply_fast(self, pipeline: Pipeline, data: V) -> Any:
+        return self._run_fast(pipeline, data)
 
 
-@dataclass
+@slotted_dataclass
 class Create(Transformation, Generic[V]):
     model: Type[V]
 
@@ -230,7 +361,7 @@ class Create(Transformation, Generic[V]):
         return pipeline.create(self.model, data, *args, **kwargs)
 
 
-@dataclass
+@slotted_dataclass
 class CreateMultiple(Transformation, Generic[V]):
     model: Type[V]
 
@@ -240,28 +371,40 @@ class CreateMultiple(Transformation, Generic[V]):
         return list(pipeline.create_multiple(self.model, data, *args, **kwargs))
 
 
-@dataclass
+@slotted_dataclass
 class GetOrCreate(Transformation, Generic[V]):
     model: Type[V]
     match_targets: Optional[List[str]] = None
+    cache: bool = False
 
     def apply(self, pipeline: Pipeline, data: Any, *args, **kwargs) -> Tuple[V, bool]:
         return pipeline.get_or_create(
-            self.model, data, *args, match_targets=self.match_targets, **kwargs
+            self.model,
+            data,
+            *args,
+            match_targets=self.match_targets,
+            _cache=self.cache,
+            **kwargs,
         )
 
 
-@dataclass
+@slotted_dataclass
 class GetOrCreateMultiple(Transformation, Generic[V]):
     model: Type[V]
     match_targets: Optional[List[str]] = None
+    cache: bool = False
 
     def apply(
         self, pipeline: Pipeline, data: Sequence[Any], *args, **kwargs
     ) -> List[Tuple[V, bool]]:
         return list(
             pipeline.get_or_create_multiple(
-                self.model, data, *args, match_targets=self.match_targets, **kwargs
+                self.model,
+                data,
+                *args,
+                match_targets=self.match_targets,
+                _cache=self.cache,
+                **kwargs,
             )
         )
 